@@ -5,23 +5,43 @@
 '''
 
 import argparse
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import errno
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import json
 import os
+import queue
 import shutil
 import smtplib
+import stat
+import subprocess
 import sys
+import threading
 import time
 import colorlog
 
 #pylint: disable=broad-exception-caught
 TEMPLATE = "An exception of type %s occurred. Arguments:\n%s"
-SUFFIX = ['analysis', 'output', 'raw_data']
-ERRORS = []
-DELETED = []
-TRANSFERRED = []
+SUFFIX = ('analysis', 'output', 'raw_data')
+# Largest number of bytes requested from a single in-kernel copy call
+COPY_CHUNK = 1 << 30
+# On Linux, directory trees are walked with os.fwalk and file operations are made
+# relative to open directory descriptors (so only one path component is resolved
+# per call), and file data is copied in the kernel. Elsewhere os.sendfile can't
+# write to a regular file, so the scandir walkers and shutil.copy2 are used.
+FD_FUNCTIONS = sys.platform.startswith('linux') \
+               and hasattr(os, 'fwalk') \
+               and {os.open, os.stat, os.readlink, os.symlink, os.unlink,
+                    os.rmdir} <= os.supports_dir_fd \
+               and {os.chmod, os.utime} <= os.supports_fd
+# Results are queued from the worker threads and drained when the email is sent
+ERRORS = queue.SimpleQueue()
+DELETED = queue.SimpleQueue()
+TRANSFERRED = queue.SimpleQueue()
+SMTP_CONNECTION = None
 
 def terminate_program(msg=None):
     """ Log an optional error to output, close files, and exit
@@ -35,6 +55,41 @@ def terminate_program(msg=None):
     sys.exit(-1 if msg else 0)
 
 
+def close_smtp():
+    """ Close the cached mail server connection, if there is one
+        Keyword arguments:
+          None
+        Returns:
+          None
+    """
+    global SMTP_CONNECTION #pylint: disable=global-statement
+    if SMTP_CONNECTION:
+        try:
+            SMTP_CONNECTION.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        SMTP_CONNECTION = None
+
+
+def get_smtp():
+    """ Get a mail server connection, reusing the cached one if it's still alive
+        Keyword arguments:
+          None
+        Returns:
+          smtplib.SMTP object
+    """
+    global SMTP_CONNECTION #pylint: disable=global-statement
+    if SMTP_CONNECTION:
+        try:
+            if SMTP_CONNECTION.noop()[0] == 250:
+                return SMTP_CONNECTION
+        except (smtplib.SMTPServerDisconnected, OSError):
+            pass
+        close_smtp()
+    SMTP_CONNECTION = smtplib.SMTP(CONFIG['mail_server'])
+    return SMTP_CONNECTION
+
+
 def send_email(mail_text, sender, receivers, subject):
     """ Send an email
         Keyword arguments:
@@ -52,11 +107,10 @@ def send_email(mail_text, sender, receivers, subject):
     message["Subject"] =subject
     message.attach(MIMEText(mail_text, 'plain'))
     try:
-        smtpobj = smtplib.SMTP(CONFIG['mail_server'])
-        smtpobj.sendmail(sender, receivers, message.as_string())
-        smtpobj.quit()
+        get_smtp().sendmail(sender, receivers, message.as_string())
     except smtplib.SMTPException as err:
-        raise smtplib.SMTPException("There was a error and the email was not sent:\n" + err)
+        raise smtplib.SMTPException("There was a error and the email was not sent:\n"
+                                    + str(err)) from err
     except Exception as err:
         raise err
 
@@ -83,26 +137,321 @@ def setup_logging(arg):
 
 def experiment_complete(exp):
     """ Ensure that the experiment is complete by the presence of a sentinel
-        file that is at least 5 minutes old.
+        file that is at least minimum_age seconds old.
         Keyword arguments:
-          base_dir: base directory
+          exp: experiment
         Returns:
           True for complete, False for incomplete
     """
-    sentinel = f"{CONFIG['source']}/merfish_raw_data/{exp}/MERLIN_FINISHED"
-    if not os.path.isfile(sentinel):
+    sentinel = f"{SOURCE_ROOT['raw_data']}/{exp}/MERLIN_FINISHED"
+    try:
+        sstat = os.stat(sentinel)
+    except OSError:
+        sstat = None
+    if not sstat or not stat.S_ISREG(sstat.st_mode):
         LOGGER.warning("%s is in process", exp)
         return False
-    modtime = os.path.getmtime(sentinel)
-    CONFIG['minimum_age'] = 5 * 60
-    age = int(time.time() - modtime)
-    if age <= CONFIG['minimum_age']:
+    age = int(time.time() - sstat.st_mtime)
+    if age <= MINIMUM_AGE:
         hms = datetime.timedelta(seconds=age)
         LOGGER.warning("%s is only %s old", exp, hms)
         return False
     return True
 
 
+def copy_file_descriptor(src_fd, dst_fd, size):
+    """ Copy the contents of one open file to another without passing the data
+        through Python. copy_file_range allows reflinks and server-side copies;
+        sendfile is used when the filesystems don't support it, or when
+        copy_file_range stops short (some network and FUSE filesystems return 0
+        rather than raising an error).
+        Keyword arguments:
+          src_fd: source file descriptor
+          dst_fd: destination file descriptor
+          size: source file size
+        Returns:
+          None
+    """
+    copied = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK)
+                if not sent:
+                    break
+                copied += sent
+        except OSError:
+            # File offsets have advanced past anything already copied
+            pass
+    while copied < size:
+        sent = os.sendfile(dst_fd, src_fd, None, COPY_CHUNK)
+        if not sent:
+            break
+        copied += sent
+    if copied != size:
+        # Never let a short copy pass for a complete one
+        raise OSError(errno.EIO, f"Copied {copied} of {size} bytes")
+
+
+def up_to_date(src_stat, dst_stat):
+    """ Determine if a destination file already matches its source
+        Keyword arguments:
+          src_stat: source file stat result
+          dst_stat: destination file stat result (or None if it doesn't exist)
+        Returns:
+          True if the destination has the same size and is no older than the source
+    """
+    return bool(dst_stat) and dst_stat.st_size == src_stat.st_size \
+           and dst_stat.st_mtime >= src_stat.st_mtime
+
+
+def copy_link(link, dst, dir_fd=None, target_is_directory=False):
+    """ Create a symbolic link. As with up-to-date files, an existing link with
+        the same contents is left alone; anything else at the destination is
+        replaced.
+        Keyword arguments:
+          link: link contents (the path it points to)
+          dst: destination link
+          dir_fd: directory file descriptor that dst is relative to
+          target_is_directory: link points to a directory (Windows only)
+        Returns:
+          None
+    """
+    try:
+        current = os.readlink(dst, dir_fd=dir_fd)
+    except FileNotFoundError:
+        current = None
+    except OSError:
+        # Something other than a link is in the way
+        current = ""
+    if current == link:
+        return
+    if current is not None:
+        os.unlink(dst, dir_fd=dir_fd)
+    os.symlink(link, dst, target_is_directory=target_is_directory, dir_fd=dir_fd)
+
+
+def copy_metadata(src_stat, dst_fd):
+    """ Copy permissions and access/modification times to an open file or directory
+        Keyword arguments:
+          src_stat: source stat result
+          dst_fd: destination file descriptor
+        Returns:
+          None
+    """
+    os.chmod(dst_fd, stat.S_IMODE(src_stat.st_mode))
+    os.utime(dst_fd, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+
+def copy_file_at(name, src_dir_fd, tgt_dir_fd):
+    """ Copy a file (or symbolic link) and its metadata between two open
+        directories, keeping the data in the kernel. As with fast_copyfile, an
+        up-to-date destination is left alone.
+        Keyword arguments:
+          name: file name
+          src_dir_fd: source directory file descriptor
+          tgt_dir_fd: target directory file descriptor
+        Returns:
+          None
+    """
+    try:
+        # O_NONBLOCK so that opening a FIFO can't hang; it has no effect on
+        # reading a regular file
+        src_fd = os.open(name, os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK,
+                         dir_fd=src_dir_fd)
+    except OSError as err:
+        if err.errno != errno.ELOOP:
+            raise
+        copy_link(os.readlink(name, dir_fd=src_dir_fd), name, dir_fd=tgt_dir_fd)
+        return
+    try:
+        src_stat = os.fstat(src_fd)
+        if not stat.S_ISREG(src_stat.st_mode):
+            # FIFOs, sockets and devices (shutil.copy2 refuses these too)
+            raise shutil.SpecialFileError(f"{name} is not a regular file")
+        try:
+            dst_stat = os.stat(name, dir_fd=tgt_dir_fd)
+        except FileNotFoundError:
+            dst_stat = None
+        if up_to_date(src_stat, dst_stat):
+            return
+        dst_fd = os.open(name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666,
+                         dir_fd=tgt_dir_fd)
+        try:
+            copy_file_descriptor(src_fd, dst_fd, src_stat.st_size)
+            copy_metadata(src_stat, dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+
+def raise_error(err):
+    """ os.fwalk error handler that stops the walk instead of skipping the entry
+        Keyword arguments:
+          err: OSError
+        Returns:
+          None
+    """
+    raise err
+
+
+def fast_copyfile(src, dst):
+    """ Copy a file and its metadata with shutil.copy2. A destination with the
+        same size and a modification time no older than the source's is left
+        alone, so rerunning a partially completed transfer only copies what's
+        missing.
+        Keyword arguments:
+          src: source file
+          dst: destination file
+        Returns:
+          Destination file
+    """
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    if dst_stat and up_to_date(os.stat(src), dst_stat):
+        return dst
+    return shutil.copy2(src, dst)
+
+
+def prefetch_metadata(base_dir, done):
+    """ Read the directory listings of a tree without copying anything, so that
+        they're already cached when the copy reaches them. Files aren't stat'ed,
+        since that would add a syscall per file on Linux (and on Windows the
+        listing already carries the file attributes). Errors are ignored - the
+        copy will report its own.
+        Keyword arguments:
+          base_dir: base directory
+          done: threading.Event set once the copy has finished
+        Returns:
+          None
+    """
+    if done.is_set():
+        return
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                if done.is_set():
+                    return
+                if entry.is_dir(follow_symlinks=False):
+                    prefetch_metadata(entry.path, done)
+    except OSError:
+        pass
+
+
+def copy_tree(src, tgt):
+    """ Copy a directory tree, classifying entries from the directory listing
+        instead of stat'ing each one. Symbolic links are copied as links.
+        Keyword arguments:
+          src: source directory
+          tgt: target directory (may already exist)
+        Returns:
+          None
+    """
+    if FD_FUNCTIONS:
+        # Bottom-up, so each directory's times are set after its contents are written
+        for dirpath, dirnames, filenames, src_dir_fd in os.fwalk(src, topdown=False,
+                                                                  onerror=raise_error):
+            tdir = tgt + dirpath[len(src):]
+            os.makedirs(tdir, exist_ok=True)
+            tgt_dir_fd = os.open(tdir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                for name in filenames:
+                    copy_file_at(name, src_dir_fd, tgt_dir_fd)
+                for name in dirnames:
+                    # os.fwalk lists links to directories as directories
+                    if stat.S_ISLNK(os.stat(name, dir_fd=src_dir_fd,
+                                            follow_symlinks=False).st_mode):
+                        copy_link(os.readlink(name, dir_fd=src_dir_fd), name,
+                                  dir_fd=tgt_dir_fd)
+                copy_metadata(os.fstat(src_dir_fd), tgt_dir_fd)
+            finally:
+                os.close(tgt_dir_fd)
+        return
+    os.makedirs(tgt, exist_ok=True)
+    # entry.path already holds the source path; build the target prefix once
+    tgt_prefix = tgt + "/"
+    with os.scandir(src) as entries:
+        for entry in entries:
+            dst = tgt_prefix + entry.name
+            if entry.is_symlink():
+                copy_link(os.readlink(entry.path), dst, target_is_directory=entry.is_dir())
+            elif entry.is_dir(follow_symlinks=False):
+                copy_tree(entry.path, dst)
+            else:
+                fast_copyfile(entry.path, dst)
+    shutil.copystat(src, tgt)
+
+
+def tar_copy(src, tgt):
+    """ Copy a directory tree as a single stream piped from one tar process to
+        another, rather than file by file
+        Keyword arguments:
+          src: source directory
+          tgt: target directory (may already exist)
+        Returns:
+          None
+    """
+    os.makedirs(tgt, exist_ok=True)
+    with subprocess.Popen(['tar', '-cf', '-', '-C', src, '.'], stdout=subprocess.PIPE) as reader:
+        with subprocess.Popen(['tar', '-xf', '-', '-C', tgt], stdin=reader.stdout) as writer:
+            # Only the writer should hold the pipe, so the reader sees it close
+            reader.stdout.close()
+    for proc in (reader, writer):
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+def is_junction(entry):
+    """ Determine if a directory entry is a Windows junction (mount point). These
+        are reported as directories rather than links, but must not be followed.
+        Keyword arguments:
+          entry: os.DirEntry
+        Returns:
+          True for a junction, False otherwise
+    """
+    if os.name != 'nt':
+        return False
+    # On Windows the lstat result is cached from the directory listing
+    tag = entry.stat(follow_symlinks=False).st_reparse_tag
+    return tag == stat.IO_REPARSE_TAG_MOUNT_POINT #pylint: disable=no-member
+
+
+def remove_tree(base_dir):
+    """ Delete a directory tree, classifying entries from the directory listing
+        instead of stat'ing each one
+        Keyword arguments:
+          base_dir: base directory
+        Returns:
+          None
+    """
+    if FD_FUNCTIONS:
+        for _, dirnames, filenames, dir_fd in os.fwalk(base_dir, topdown=False,
+                                                       onerror=raise_error):
+            for name in filenames:
+                os.unlink(name, dir_fd=dir_fd)
+            for name in dirnames:
+                try:
+                    os.rmdir(name, dir_fd=dir_fd)
+                except NotADirectoryError:
+                    # A link to a directory
+                    os.unlink(name, dir_fd=dir_fd)
+        os.rmdir(base_dir)
+        return
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            if is_junction(entry):
+                # Remove the junction itself, never the directory it points to
+                os.rmdir(entry.path)
+            elif entry.is_dir(follow_symlinks=False):
+                remove_tree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(base_dir)
+
+
 def delete_directory(base_dir):
     """ Delete a directory tree
         Keyword arguments:
@@ -111,24 +460,39 @@ def delete_directory(base_dir):
           True for success, False for failure
     """
     if ARG.DELETE:
+        retry = False
         try:
-            shutil.rmtree(base_dir)
-        except Exception as err:
-            ERRORS.append(f"Could not rmtree delete {base_dir}\n" \
-                          + (TEMPLATE % (type(err).__name__, err.args)))
-            return False
-        if os.path.exists(base_dir):
+            remove_tree(base_dir)
+        except FileNotFoundError as err:
+            if err.filename == base_dir:
+                LOGGER.warning("Delete path %s does not exist", base_dir)
+                return False
+            retry = True
+        except Exception:
+            retry = True
+        if retry:
+            # Let shutil retry whatever is left, and report its error if it fails too
+            try:
+                shutil.rmtree(base_dir)
+            except Exception as rmerr:
+                ERRORS.put(f"Could not rmtree delete {base_dir}\n" \
+                           + (TEMPLATE % (type(rmerr).__name__, rmerr.args)))
+                return False
             # There are some cases where the tree is deleted with the exception
             # of the top-level dir
             try:
                 os.rmdir(base_dir)
-            except Exception as err:
-                ERRORS.append(f"Could not rmdir delete {base_dir}\n" \
-                              + (TEMPLATE % (type(err).__name__, err.args)))
-        if os.path.exists(base_dir):
-            ERRORS.append("Despite attempts to delete it, %s still exists", base_dir)
+            except FileNotFoundError:
+                pass
+            except OSError as rderr:
+                ERRORS.put(f"Could not rmdir delete {base_dir}\n" \
+                           + (TEMPLATE % (type(rderr).__name__, rderr.args)))
+                return False
+    elif not os.path.exists(base_dir):
+        LOGGER.warning("Delete path %s does not exist", base_dir)
+        return False
     LOGGER.info("Deleted %s", base_dir)
-    DELETED.append(base_dir)
+    DELETED.put(base_dir)
     return True
 
 
@@ -142,88 +506,133 @@ def delete_experiment(exp):
     # Check to see if directories have been transferred
     transfer_error = False
     for sfx in SUFFIX:
-        tgt = f"{CONFIG['target']}/merfish_{sfx}/{exp}"
+        tgt = f"{TARGET_ROOT[sfx]}/{exp}"
         if not os.path.exists(tgt):
-            ERRORS.append(f"Experiment {exp} merfish_{sfx} did not transfer")
+            ERRORS.put(f"Experiment {exp} merfish_{sfx} did not transfer")
             transfer_error = True
     if transfer_error:
         msg = f"Deletion for {exp} is cancelled"
         LOGGER.error(msg)
-        ERRORS.append(msg)
+        ERRORS.put(msg)
         return
     # Check for sentinel file
-    sentinel = f"{CONFIG['target']}/merfish_output/{exp}/MERLIN_TRANSFERRED"
+    sentinel = f"{TARGET_ROOT['output']}/{exp}/MERLIN_TRANSFERRED"
     if not os.path.isfile(sentinel):
         msg = f"MERLIN_TRANSFERRED sentinel file missing for {exp}"
         LOGGER.error(msg)
-        ERRORS.append(msg)
+        ERRORS.put(msg)
         return
     # Delete files
     delete_done = True
     for sfx in SUFFIX:
-        src = f"{CONFIG['source']}/merfish_{sfx}/{exp}"
+        src = f"{SOURCE_ROOT[sfx]}/{exp}"
         if not delete_directory(src):
             delete_done = False
             break
     if delete_done:
-        src = f"{CONFIG['secondary']}/{exp}"
-        if not os.path.exists(src):
-            LOGGER.warning("Secondary delete path %s does not exist", src)
-            delete_done = False
-        else:
-            delete_done = delete_directory(src)
+        delete_done = delete_directory(f"{SECONDARY}/{exp}")
     if not delete_done:
-        ERRORS.append(f"Deletion for {exp} is incomplete")
+        ERRORS.put(f"Deletion for {exp} is incomplete")
 
 
-def handle_single_experiment(exp):
+def start_copy(src, tgt, copier, copy_pool, prefetch_pool):
+    """ Start copying a directory tree, with a metadata prefetch running ahead of
+        it. The prefetch stops (or never starts) once the copy is finished.
+        Keyword arguments:
+          src: source directory
+          tgt: target directory
+          copier: function that copies a tree from src to tgt
+          copy_pool: executor shared by all directory copies
+          prefetch_pool: executor shared by all metadata prefetches
+        Returns:
+          Future for the copy
+    """
+    done = threading.Event()
+    prefetch_pool.submit(prefetch_metadata, src, done)
+    future = copy_pool.submit(copier, src, tgt)
+    future.add_done_callback(lambda _: done.set())
+    return future
+
+
+def handle_single_experiment(exp, present, copy_pool, prefetch_pool):
     """ Transfer/delete directories for a single experiment
         Keyword arguments:
           exp: experiment
+          present: dictionary of experiment names (keyed by suffix) in the source
+                   directories other than merfish_output
+          copy_pool: executor shared by all directory copies
+          prefetch_pool: executor shared by all metadata prefetches
         Returns:
           None
     """
-    tgt = CONFIG['secondary']
-    if not os.path.exists(tgt):
-        ERRORS.append(f"Could not find target path {tgt}")
-        return
-    missing = False
-    for sfx in SUFFIX:
-        if not os.path.exists(f"{CONFIG['source']}/merfish_{sfx}/{exp}"):
-            missing = True
-    if missing:
+    if not all(exp in names for names in present.values()):
         LOGGER.debug("%s is not in the required subfolders", exp)
         return
     LOGGER.info(exp)
     if not experiment_complete(exp):
         return
-    transfer_complete = True
-    src_base = f"{CONFIG['source']}"
-    for sfx in SUFFIX:
-        src = f"{src_base}/merfish_{sfx}/{exp}"
-        tgt = f"{CONFIG['target']}/merfish_{sfx}/{exp}"
+    # Copy the suffix directories concurrently
+    copier = tar_copy if TAR_TRANSFER else copy_tree
+    copies = {}
+    for src_root, tgt_root in ROOT_PAIRS:
+        src = f"{src_root}/{exp}"
+        tgt = f"{tgt_root}/{exp}"
         LOGGER.info("Copy %s to %s", src, tgt)
-        if not ARG.TRANSFER:
-            continue
-        try:
-            shutil.copytree(src, tgt, dirs_exist_ok=True, symlinks=True)
-        except Exception as err:
+        if ARG.TRANSFER:
+            copies[src] = start_copy(src, tgt, copier, copy_pool, prefetch_pool)
+    transfer_complete = True
+    for src, future in copies.items():
+        err = future.exception()
+        if err:
             transfer_complete = False
-            ERRORS.append(f"Could not copy {src}/{exp}\n"
-                          + (TEMPLATE % (type(err).__name__, err.args)))
-            break
+            ERRORS.put(f"Could not copy {src}\n"
+                       + (TEMPLATE % (type(err).__name__, err.args)))
     if transfer_complete:
         if ARG.TRANSFER:
             # Write sentinel file
-            sentinel = f"{CONFIG['target']}/merfish_output/{exp}/MERLIN_TRANSFERRED"
+            sentinel = f"{TARGET_ROOT['output']}/{exp}/MERLIN_TRANSFERRED"
             LOGGER.info("Writing sentinel file %s", sentinel)
             with open(sentinel, 'w', encoding='ascii') as outfile:
                 outfile.write("Transfer complete")
-        TRANSFERRED.append(exp)
+        TRANSFERRED.put(exp)
         # Delete the experiment
         delete_experiment(exp)
 
 
+def run_single_experiment(exp, present, copy_pool, prefetch_pool):
+    """ Handle a single experiment, recording any unexpected failure as an error
+        so that it can't stop the other experiments
+        Keyword arguments:
+          exp: experiment
+          present: dictionary of experiment names (keyed by suffix) in the source
+          copy_pool: executor shared by all directory copies
+          prefetch_pool: executor shared by all metadata prefetches
+        Returns:
+          None
+    """
+    try:
+        handle_single_experiment(exp, present, copy_pool, prefetch_pool)
+    except Exception as err:
+        LOGGER.error("Could not process %s", exp)
+        ERRORS.put(f"Could not process {exp} - check the log and rerun with --file {exp}\n"
+                   + (TEMPLATE % (type(err).__name__, err.args)))
+
+
+def drain_queue(que):
+    """ Remove everything from a queue
+        Keyword arguments:
+          que: queue
+        Returns:
+          List of queued items
+    """
+    items = []
+    while True:
+        try:
+            items.append(que.get_nowait())
+        except queue.Empty:
+            return items
+
+
 def email_results():
     """ Send a results email message
         Keyword arguments:
@@ -232,27 +641,54 @@ def email_results():
           None
     """
     LOGGER.info("Sending mail for transferred/deleted experiments")
-    mtext = ""
-    if TRANSFERRED:
-        mtext += "The following experiments have been transferred:\n"
+    transferred = drain_queue(TRANSFERRED)
+    deleted = drain_queue(DELETED)
+    errors = drain_queue(ERRORS)
+    parts = []
+    if transferred:
+        parts.append("The following experiments have been transferred:\n")
         if not ARG.TRANSFER:
-            mtext += "--- TRANSFER mode was not enabled - no files were transferred ---\n"
-        mtext += "\n".join(TRANSFERRED) + "\n\n"
-    if DELETED:
-        mtext += "The following directories have been deleted:\n"
+            parts.append("--- TRANSFER mode was not enabled - no files were transferred ---\n")
+        parts.extend(("\n".join(transferred), "\n\n"))
+    if deleted:
+        parts.append("The following directories have been deleted:\n")
         if not ARG.DELETE:
-            mtext += "--- DELETE mode was not enabled - no files were deleted ---\n"
-        mtext += "\n".join(DELETED) + "\n\n"
-    if ERRORS:
-        mtext += "The following errors have occurred:\n"
-        mtext += "\n".join(ERRORS)
+            parts.append("--- DELETE mode was not enabled - no files were deleted ---\n")
+        parts.extend(("\n".join(deleted), "\n\n"))
+    if errors:
+        parts.append("The following errors have occurred:\n")
+        parts.append("\n".join(errors))
     try:
-        send_email(mtext, CONFIG['sender'], CONFIG['receivers'],
+        send_email("".join(parts), CONFIG['sender'], CONFIG['receivers'],
                    "MERSCOPE experiments transferred")
     except Exception as err:
         terminate_program(TEMPLATE % (type(err).__name__, err.args))
 
 
+def scan_source_directories():
+    """ Read each source suffix directory (other than merfish_output, which
+        drives processing) once to find the experiments it holds
+        Keyword arguments:
+          None
+        Returns:
+          Dictionary of experiment name sets, keyed by suffix
+    """
+    present = {}
+    for sfx in SUFFIX:
+        if sfx == 'output':
+            continue
+        sdir = SOURCE_ROOT[sfx]
+        LOGGER.info("Reading experiments from %s", sdir)
+        try:
+            with os.scandir(sdir) as entries:
+                present[sfx] = {entry.name for entry in entries}
+        except FileNotFoundError:
+            terminate_program(f"Could not find source directory {sdir}")
+        except Exception as err:
+            terminate_program(TEMPLATE % (type(err).__name__, err.args))
+    return present
+
+
 def process_experiments():
     """ Process the source directories for experiments
         Keyword arguments:
@@ -260,21 +696,36 @@ def process_experiments():
         Returns:
           None
     """
-    sdir = f"{CONFIG['source']}/merfish_output"
+    present = scan_source_directories()
+    sdir = SOURCE_ROOT['output']
     LOGGER.info("Reading experiments from %s", sdir)
     try:
-        dirs = os.listdir(sdir)
+        entries = os.scandir(sdir)
     except FileNotFoundError:
         terminate_program(f"Could not find source directory {sdir}")
     except Exception as err:
         terminate_program(TEMPLATE % (type(err).__name__, err.args))
-    if ARG.FILE and ARG.FILE not in dirs:
-        terminate_program(f"Experiment {ARG.FILE} is not in {sdir}")
-    for edir in dirs:
-        if ARG.FILE and edir != ARG.FILE:
-            continue
-        handle_single_experiment(edir)
-    if TRANSFERRED or DELETED or ERRORS:
+    with entries:
+        if ARG.FILE and not os.path.exists(f"{sdir}/{ARG.FILE}"):
+            terminate_program(f"Experiment {ARG.FILE} is not in {sdir}")
+        if not os.path.exists(SECONDARY):
+            ERRORS.put(f"Could not find target path {SECONDARY}")
+            email_results()
+            return
+        # Experiments are independent, so run a bounded number of them at once.
+        # They're submitted as the listing is read, so work starts right away.
+        # Directory copies and metadata prefetches from all experiments each share
+        # one pool of the same size, which caps the number of each in flight.
+        concurrency = CONFIG.get('transfer_concurrency', 8)
+        with ThreadPoolExecutor(max_workers=concurrency) as prefetch_pool, \
+             ThreadPoolExecutor(max_workers=concurrency) as copy_pool, \
+             ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for entry in entries:
+                if ARG.FILE and entry.name != ARG.FILE:
+                    continue
+                executor.submit(run_single_experiment, entry.name, present, copy_pool,
+                                prefetch_pool)
+    if not (TRANSFERRED.empty() and DELETED.empty() and ERRORS.empty()):
         email_results()
 
 
@@ -292,8 +743,16 @@ if __name__ == '__main__':
     PARSER.add_argument('--debug', dest='DEBUG', action='store_true',
                         default=False, help='Flag, Very chatty')
     ARG = PARSER.parse_args()
+    atexit.register(close_smtp)
     LOGGER = setup_logging(ARG)
     with open('config.json', encoding='utf-8') as f:
         CONFIG = json.load(f)
+    MINIMUM_AGE = CONFIG.get('minimum_age', 5 * 60)
+    SECONDARY = CONFIG['secondary']
+    TAR_TRANSFER = CONFIG.get('tar_transfer', False)
+    # Per-suffix source and target directories
+    SOURCE_ROOT = {sfx: f"{CONFIG['source']}/merfish_{sfx}" for sfx in SUFFIX}
+    TARGET_ROOT = {sfx: f"{CONFIG['target']}/merfish_{sfx}" for sfx in SUFFIX}
+    ROOT_PAIRS = [(SOURCE_ROOT[sfx], TARGET_ROOT[sfx]) for sfx in SUFFIX]
     process_experiments()
     terminate_program()